@@ -1,18 +1,25 @@
 # app/api/routes.py
 from __future__ import annotations
 
-from typing import Dict
+import asyncio
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Response
+from pydantic import BaseModel
+from sqlalchemy import Text, cast, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app import session_store
 from app.services import IntakeSessionService
-from app.intake.state import IntakeState
 from app.intake.summarizer import build_structured_intake_with_llm
 from app.llm import OpenAILLMClient
 from app.rag import index_encounter_for_rag, answer_doctor_question
-from app.db import SessionLocal
+from app.db import get_session
 from app.models import StructuredIntake
-from app.intake.schema import StructuredIntakeModel
+from app.intake.schema import (
+    StructuredIntakeModel,
+    STRUCTURED_INTAKE_DECODER,
+    JSON_ENCODER,
+)
 from .schemas import (
     StartIntakeRequest,
     StartIntakeResponse,
@@ -21,43 +28,80 @@ from .schemas import (
     QARequest,
     QAResponse,
     RetrievedChunkSchema,
-    StructuredIntakeResponse,
 )
 
 router = APIRouter()
 
-_session_states: Dict[str, IntakeState] = {}
-
 _service = IntakeSessionService()
 _llm_client = OpenAILLMClient()
 
 
+def _json_response(model: BaseModel) -> Response:
+    """
+    Serialize a response model straight to JSON bytes with its compiled
+    pydantic-core serializer. FastAPI's default path would dump it to a
+    dict, re-validate it against response_model, and JSON-encode the result.
+    response_model stays on the routes for the OpenAPI docs.
+    """
+    return Response(model.model_dump_json(), media_type="application/json")
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    True if an If-None-Match header value covers the given (quoted) ETag.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+async def _finalize_encounter(encounter_id: str) -> None:
+    """
+    Build the structured intake note and index the encounter for RAG.
+    Scheduled as a background task so it runs after the response has been
+    sent; indexing (embeddings + bulk insert) is blocking, so it gets a
+    worker thread.
+    """
+    await build_structured_intake_with_llm(encounter_id, llm_client=_llm_client)
+    await asyncio.to_thread(index_encounter_for_rag, encounter_id)
+
+
 @router.post("/intake/start", response_model=StartIntakeResponse)
-def start_intake(payload: StartIntakeRequest) -> StartIntakeResponse:
+async def start_intake(payload: StartIntakeRequest) -> Response:
     """
     Start a new intake session.
     Creates Patient + Encounter + first assistant question.
     """
     display_name = payload.patient_display_name or "Web Demo Patient"
 
-    state, first_question, patient_id, encounter_id = _service.start_session(
-        patient_display_name=display_name
+    state, first_question, patient_id, encounter_id = await asyncio.to_thread(
+        _service.start_session,
+        patient_display_name=display_name,
     )
 
-    _session_states[encounter_id] = state
+    await session_store.put(encounter_id, state)
 
-    return StartIntakeResponse(
-        patient_id=patient_id,
-        encounter_id=encounter_id,
-        first_question=first_question,
-        stage=state.stage.value,
+    return _json_response(
+        StartIntakeResponse(
+            patient_id=patient_id,
+            encounter_id=encounter_id,
+            first_question=first_question,
+            stage=state.stage.value,
+        )
     )
 
 
 @router.post("/intake/message", response_model=IntakeMessageResponse)
-def intake_message(payload: IntakeMessageRequest) -> IntakeMessageResponse:
+async def intake_message(
+    payload: IntakeMessageRequest,
+    background_tasks: BackgroundTasks,
+) -> Response:
     encounter_id = payload.encounter_id
-    state = _session_states.get(encounter_id)
+    state = await session_store.get(encounter_id)
 
     if state is None:
         raise HTTPException(
@@ -65,49 +109,73 @@ def intake_message(payload: IntakeMessageRequest) -> IntakeMessageResponse:
             detail="Encounter state not found. Start a new intake session.",
         )
 
-    state, next_q = _service.handle_turn(
+    state, next_q = await asyncio.to_thread(
+        _service.handle_turn,
         state=state,
         encounter_id=encounter_id,
         patient_message=payload.message,
     )
-    _session_states[encounter_id] = state
+    await session_store.put(encounter_id, state)
 
     is_complete = next_q is None
 
     if is_complete:
-        build_structured_intake_with_llm(encounter_id, llm_client=_llm_client)
-        index_encounter_for_rag(encounter_id)
+        background_tasks.add_task(_finalize_encounter, encounter_id)
 
-    return IntakeMessageResponse(
-        next_question=next_q,
-        is_complete=is_complete,
-        stage=state.stage.value,
+    return _json_response(
+        IntakeMessageResponse(
+            next_question=next_q,
+            is_complete=is_complete,
+            stage=state.stage.value,
+        )
     )
 
 
 @router.get(
     "/encounters/{encounter_id}/structured",
-    response_model=StructuredIntakeResponse,
+    response_model=StructuredIntakeModel,
 )
-def get_structured_intake(encounter_id: str) -> StructuredIntakeResponse:
-    session = SessionLocal()
-    try:
-        db_obj = session.get(StructuredIntake, encounter_id)
-        if db_obj is None:
-            raise HTTPException(
-                status_code=404,
-                detail="Structured intake not found for this encounter.",
+async def get_structured_intake(
+    encounter_id: str,
+    session: AsyncSession = Depends(get_session),
+    if_none_match: str | None = Header(None),
+) -> Response:
+    # Fetch the JSONB as text so it goes straight into the msgspec decoder.
+    row = (
+        await session.execute(
+            select(cast(StructuredIntake.data, Text), StructuredIntake.etag).where(
+                StructuredIntake.encounter_id == encounter_id
             )
+        )
+    ).first()
+    if row is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Structured intake not found for this encounter.",
+        )
 
-        model = StructuredIntakeModel.model_validate(db_obj.data)
-        return StructuredIntakeResponse(**model.model_dump())
-    finally:
-        session.close()
+    raw, etag = row
+    headers = {}
+    if etag is not None:
+        headers["ETag"] = f'"{etag}"'
+        if _etag_matches(if_none_match, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+    # The payload was validated against StructuredIntakeModel when it was
+    # written (see app/intake/summarizer.py); decoding through the msgspec
+    # mirror just normalises the shape. Returning a Response directly skips
+    # FastAPI's Pydantic serializer; response_model is kept for the docs.
+    intake = STRUCTURED_INTAKE_DECODER.decode(raw)
+    return Response(
+        JSON_ENCODER.encode(intake),
+        media_type="application/json",
+        headers=headers,
+    )
 
 
 @router.post("/patient/qa", response_model=QAResponse)
-def patient_qa(payload: QARequest) -> QAResponse:
-    answer, chunks = answer_doctor_question(
+async def patient_qa(payload: QARequest) -> Response:
+    answer, chunks = await answer_doctor_question(
         patient_id=payload.patient_id,
         question=payload.question,
         llm_client=_llm_client,
@@ -125,4 +193,4 @@ def patient_qa(payload: QARequest) -> QAResponse:
         for c in chunks
     ]
 
-    return QAResponse(answer=answer, chunks=chunk_schemas)
+    return _json_response(QAResponse(answer=answer, chunks=chunk_schemas))
@@ -5,8 +5,6 @@ from typing import Optional, List
 
 from pydantic import BaseModel
 
-from app.intake.schema import StructuredIntakeModel
-
 
 class StartIntakeRequest(BaseModel):
     patient_display_name: Optional[str] = None
@@ -47,6 +45,3 @@ class QAResponse(BaseModel):
     answer: str
     chunks: List[RetrievedChunkSchema]
 
-
-class StructuredIntakeResponse(StructuredIntakeModel):
-    pass
@@ -1,23 +1,31 @@
 # app/config.py
+import os
 from functools import lru_cache
-from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field
 
+import msgspec
+from dotenv import load_dotenv
 
-class Settings(BaseSettings):
-    database_url: str = Field(..., validation_alias="DATABASE_URL")
-    embedding_dim: int = Field(384, validation_alias="EMBEDDING_DIM")
 
-    openai_api_key: str | None = Field(None, validation_alias="OPENAI_API_KEY")
-    openai_base_url: str | None = Field(None, validation_alias="OPENAI_BASE_URL")
-    llm_model: str = Field("llama-3.3-70b-versatile", validation_alias="LLM_MODEL")
+class Settings(msgspec.Struct, frozen=True, rename="upper"):
+    """
+    Process settings, read from the environment (and `.env` in dev).
 
-    model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
-    )
+    Field names map to upper-cased env vars, e.g. database_url <- DATABASE_URL.
+    """
+
+    database_url: str
+    embedding_dim: int = 384
+    # Where the exported + INT8-quantized ONNX embedding model is cached.
+    onnx_cache_dir: str = ".cache/onnx"
+    redis_url: str = "redis://localhost:6379/0"
+
+    openai_api_key: str | None = None
+    openai_base_url: str | None = None
+    llm_model: str = "llama-3.3-70b-versatile"
 
 
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    return Settings()
+    # Real env vars win over .env, as with pydantic-settings.
+    load_dotenv(".env", encoding="utf-8")
+    return msgspec.convert(dict(os.environ), type=Settings, strict=False)
@@ -1,17 +1,37 @@
 # app/db.py
+from typing import AsyncIterator
+
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC, Vector
 from app.config import get_settings
 
 
 settings = get_settings()
 
-# Synchronous engine is enough for now
+# Connection health options shared by both engines.
+_POOL_OPTIONS = dict(
+    pool_pre_ping=True,
+    pool_recycle=1800,
+)
+
+# Each process gets at most 30 Postgres connections across both engines
+# (sync 15+5, async 5+5), so three `uvicorn --workers` stay under Postgres's
+# default max_connections=100. The sync engine gets the larger share: the
+# busy request paths (session start, each intake turn, RAG retrieval and
+# indexing) run on it from worker threads. The async engine only serves
+# GET /structured and the summarizer.
+
+# Synchronous engine for the service layer (intake persistence, RAG indexing
+# and retrieval), which runs in worker threads and at startup.
 engine = create_engine(
     settings.database_url,
     echo=False,  # set True if you want to see SQL queries
     future=True,
+    pool_size=15,
+    max_overflow=5,
+    **_POOL_OPTIONS,
 )
 
 SessionLocal = sessionmaker(
@@ -21,6 +41,30 @@ SessionLocal = sessionmaker(
     future=True,
 )
 
+# Async engine for request handlers that talk to the DB directly, so they
+# don't hold a threadpool slot while waiting on Postgres.
+async_engine = create_async_engine(
+    settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
+    echo=False,
+    future=True,
+    pool_size=5,
+    max_overflow=5,
+    **_POOL_OPTIONS,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    expire_on_commit=False,
+)
+
+
+async def get_session() -> AsyncIterator[AsyncSession]:
+    """
+    FastAPI dependency yielding an AsyncSession for the duration of a request.
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
+
 
 class Base(DeclarativeBase):
     """
@@ -31,3 +75,6 @@ class Base(DeclarativeBase):
 
 # Re-export Vector so models.py can import from app.db
 VectorType = Vector
+
+# FP16 vector (pgvector `halfvec`): half the storage and distance bandwidth
+HalfVectorType = HALFVEC
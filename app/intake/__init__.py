@@ -1,4 +1,16 @@
 # app/intake/__init__.py
-from .schema import StructuredIntakeModel, Symptom, Medication, Allergy
+from .schema import (
+    StructuredIntakeModel,
+    Symptom,
+    Medication,
+    Allergy,
+    StructuredIntakeStruct,
+)
 
-__all__ = ["StructuredIntakeModel", "Symptom", "Medication", "Allergy"]
+__all__ = [
+    "StructuredIntakeModel",
+    "Symptom",
+    "Medication",
+    "Allergy",
+    "StructuredIntakeStruct",
+]
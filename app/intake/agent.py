@@ -1,10 +1,25 @@
 # app/intake/agent.py
 from __future__ import annotations
 
-from typing import Optional, Dict, List
+import sys
+from typing import Optional, Dict, List, TypeVar
 
 from app.intake.state import IntakeState, IntakeTurn
-from app.intake.stages import IntakeStage
+from app.intake.stages import IntakeStage, STAGE_ORDER
+
+
+_T = TypeVar("_T")
+
+# Shared role strings for every IntakeTurn the agent records
+PATIENT_ROLE = sys.intern("patient")
+ASSISTANT_ROLE = sys.intern("assistant")
+
+
+def _by_ordinal(per_stage: Dict[IntakeStage, _T], default: _T) -> tuple[_T, ...]:
+    """
+    Flatten a per-stage mapping into a tuple indexed by IntakeStage.ordinal.
+    """
+    return tuple(per_stage.get(stage, default) for stage in STAGE_ORDER)
 
 
 class IntakeAgent:
@@ -62,6 +77,13 @@ class IntakeAgent:
         IntakeStage.DONE: [],
     }
 
+    # Lookup tables derived from the two mappings above, indexed by
+    # IntakeStage.ordinal so the per-turn path is plain tuple indexing.
+    _MAX_QUESTIONS_TABLE: tuple[int, ...] = _by_ordinal(MAX_QUESTIONS_PER_STAGE, 0)
+    _QUESTION_TABLE: tuple[tuple[str, ...], ...] = tuple(
+        map(tuple, _by_ordinal(QUESTIONS, []))
+    )
+
     # ------------------------------------------------------------------
     # Public API
     # ------------------------------------------------------------------
@@ -121,16 +143,16 @@ class IntakeAgent:
     # ------------------------------------------------------------------
 
     def _record_patient_turn(self, state: IntakeState, content: str) -> None:
-        state.turns.append(IntakeTurn(role="patient", content=content))
+        state.turns.append(IntakeTurn(role=PATIENT_ROLE, content=content))
 
     def _record_assistant_turn(self, state: IntakeState, content: str) -> None:
-        state.turns.append(IntakeTurn(role="assistant", content=content))
+        state.turns.append(IntakeTurn(role=ASSISTANT_ROLE, content=content))
 
     def _should_advance_stage(self, state: IntakeState) -> bool:
         """
         Decide whether we’ve asked enough questions in the current stage.
         """
-        max_q = self.MAX_QUESTIONS_PER_STAGE.get(state.stage, 0)
+        max_q = self._MAX_QUESTIONS_TABLE[state.stage.ordinal]
         return state.stage_question_count >= max_q
 
     def _advance_stage(self, state: IntakeState) -> None:
@@ -145,17 +167,8 @@ class IntakeAgent:
         state.stage_question_count = 0
 
     def _next_stage(self, current: IntakeStage) -> IntakeStage:
-        if current == IntakeStage.CHIEF_COMPLAINT:
-            return IntakeStage.SYMPTOM_DETAILS
-        if current == IntakeStage.SYMPTOM_DETAILS:
-            return IntakeStage.SAFETY_CHECKS
-        if current == IntakeStage.SAFETY_CHECKS:
-            return IntakeStage.HISTORY
-        if current == IntakeStage.HISTORY:
-            return IntakeStage.WRAP_UP
-        if current == IntakeStage.WRAP_UP:
-            return IntakeStage.DONE
-        return IntakeStage.DONE
+        # STAGE_ORDER ends with DONE, which is its own successor.
+        return STAGE_ORDER[min(current.ordinal + 1, len(STAGE_ORDER) - 1)]
 
     def _next_question(self, state: IntakeState) -> Optional[str]:
         """
@@ -166,12 +179,6 @@ class IntakeAgent:
         - Uses state.stage_question_count as a 0-based index.
         - If we've exhausted the list, returns None.
         """
-        candidates = self.QUESTIONS.get(state.stage, [])
-        if not candidates:
-            return None
-
+        candidates = self._QUESTION_TABLE[state.stage.ordinal]
         index = state.stage_question_count  # 0-based
-        if index >= len(candidates):
-            return None
-
-        return candidates[index]
+        return candidates[index] if index < len(candidates) else None
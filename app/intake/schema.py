@@ -3,6 +3,7 @@ from __future__ import annotations
 
 from typing import List, Optional
 
+import msgspec
 from pydantic import BaseModel, Field
 
 
@@ -61,3 +62,75 @@ class StructuredIntakeModel(BaseModel):
     model_config = {
         "extra": "ignore",
     }
+
+
+# ----------------------------------------------------------------------
+# msgspec mirror of the schema above, used on the read path
+# ----------------------------------------------------------------------
+
+
+class SymptomStruct(msgspec.Struct):
+    name: str
+    onset: Optional[str] = None
+    duration: Optional[str] = None
+    location: Optional[str] = None
+    character: Optional[str] = None
+    severity: Optional[str] = None
+    aggravating_factors: Optional[str] = None
+    relieving_factors: Optional[str] = None
+    associated_symptoms: List[str] = msgspec.field(default_factory=list)
+    red_flags: List[str] = msgspec.field(default_factory=list)
+
+
+class MedicationStruct(msgspec.Struct):
+    name: str
+    dose: Optional[str] = None
+    frequency: Optional[str] = None
+    route: Optional[str] = None
+    indication: Optional[str] = None
+
+
+class AllergyStruct(msgspec.Struct):
+    substance: str
+    reaction: Optional[str] = None
+    severity: Optional[str] = None
+
+
+class StructuredIntakeStruct(msgspec.Struct):
+    """
+    Same shape as StructuredIntakeModel, for decoding stored JSONB and
+    encoding API responses without going through Pydantic.
+
+    Unknown keys are ignored, matching the Pydantic model's extra="ignore".
+    """
+
+    chief_complaint: Optional[str] = None
+    symptoms: List[SymptomStruct] = msgspec.field(default_factory=list)
+    medications: List[MedicationStruct] = msgspec.field(default_factory=list)
+    allergies: List[AllergyStruct] = msgspec.field(default_factory=list)
+
+    past_medical_history: List[str] = msgspec.field(default_factory=list)
+    family_history: List[str] = msgspec.field(default_factory=list)
+    social_history: List[str] = msgspec.field(default_factory=list)
+
+    red_flags: List[str] = msgspec.field(default_factory=list)
+    patient_goals: Optional[str] = None
+    other_notes: Optional[str] = None
+
+
+STRUCTURED_INTAKE_DECODER = msgspec.json.Decoder(StructuredIntakeStruct)
+JSON_ENCODER = msgspec.json.Encoder()
+
+
+# Run one representative payload through both validators at import (which
+# happens during app startup via the router imports), so the first completed
+# intake doesn't pay for any lazily-initialised validator/serializer state.
+_WARMUP_PAYLOAD = {
+    "chief_complaint": "cough",
+    "symptoms": [{"name": "cough", "associated_symptoms": ["fever"]}],
+    "medications": [{"name": "paracetamol"}],
+    "allergies": [{"substance": "penicillin"}],
+    "red_flags": [],
+}
+StructuredIntakeModel.model_validate(_WARMUP_PAYLOAD).model_dump(mode="json")
+STRUCTURED_INTAKE_DECODER.decode(JSON_ENCODER.encode(_WARMUP_PAYLOAD))
@@ -3,9 +3,22 @@ from enum import Enum
 
 
 class IntakeStage(str, Enum):
+    """
+    Intake stages, declared in the order the conversation moves through them.
+    """
+
     CHIEF_COMPLAINT = "chief_complaint"
     SYMPTOM_DETAILS = "symptom_details"
     SAFETY_CHECKS = "safety_checks"
     HISTORY = "history"
     WRAP_UP = "wrap_up"
     DONE = "done"
+
+    # Position in STAGE_ORDER, set below for every member.
+    ordinal: int
+
+
+STAGE_ORDER: tuple[IntakeStage, ...] = tuple(IntakeStage)
+
+for _i, _stage in enumerate(STAGE_ORDER):
+    _stage.ordinal = _i
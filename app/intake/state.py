@@ -2,16 +2,18 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from typing import List
 
 from app.intake.stages import IntakeStage
 from app.intake.schema import StructuredIntakeModel
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class IntakeTurn:
     role: str  # "patient" or "assistant"
     content: str
+    ts: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
 
 
 @dataclass
@@ -19,8 +21,8 @@ class IntakeState:
     """
     In-memory representation of an intake session.
 
-    Later we’ll connect this to the DB (Encounter + Utterances),
-    but for now this is enough to drive a CLI demo and tests.
+    `turns` buffers the whole transcript while the intake is in progress;
+    IntakeSessionService writes it to Utterances in one go on completion.
     """
 
     stage: IntakeStage = IntakeStage.CHIEF_COMPLAINT
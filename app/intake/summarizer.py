@@ -1,62 +1,145 @@
 # app/intake/summarizer.py
 from __future__ import annotations
 
-import json
+import hashlib
+import io
+import re
 from typing import List
 
+import orjson
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncSession
 
-from app.db import SessionLocal
+from app.config import get_settings
+from app.db import AsyncSessionLocal
 from app.models import Encounter, Utterance, StructuredIntake
 from app.intake.schema import StructuredIntakeModel, Symptom, Medication, Allergy
 from app.llm import LLMClient
+from app.llm.cache import get_cached_completion, cache_completion
 
+# Bump whenever the extraction prompt changes so cached completions
+# produced by the old prompt are no longer reused.
+_PROMPT_VERSION = "v1"
 
+# Static parts of the extraction prompt, built once at import.
+_SCHEMA_DESCRIPTION = """
+You must return a single JSON object with the following structure:
 
-def _get_session() -> Session:
-    return SessionLocal()
+{
+  "chief_complaint": string or null,
+  "symptoms": [
+    {
+      "name": string,
+      "onset": string or null,
+      "duration": string or null,
+      "location": string or null,
+      "character": string or null,
+      "severity": string or null,
+      "aggravating_factors": string or null,
+      "relieving_factors": string or null,
+      "associated_symptoms": [string, ...],
+      "red_flags": [string, ...]
+    },
+    ...
+  ],
+  "medications": [
+    {
+      "name": string,
+      "dose": string or null,
+      "frequency": string or null,
+      "route": string or null,
+      "indication": string or null
+    },
+    ...
+  ],
+  "allergies": [
+    {
+      "substance": string,
+      "reaction": string or null,
+      "severity": string or null
+    },
+    ...
+  ],
+  "past_medical_history": [string, ...],
+  "family_history": [string, ...],
+  "social_history": [string, ...],
+  "red_flags": [string, ...],
+  "patient_goals": string or null,
+  "other_notes": string or null
+}
+"""
+
+_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": (
+        "You are an AI clinical intake assistant. "
+        "Given a patient–assistant intake conversation, "
+        "you extract key clinical information and output strictly formatted JSON.\n\n"
+        "Do NOT invent details that are not clearly implied. "
+        "Leave fields null or empty lists if information is missing.\n"
+    ),
+}
+
+# The transcript goes between these two; plain concatenation rather than
+# str.format because the schema description is full of braces.
+_USER_PROMPT_HEAD = (
+    "Here is the transcript of an intake conversation between a patient "
+    "and an AI assistant. Read it carefully and extract the structured information.\n\n"
+    f"{_SCHEMA_DESCRIPTION}\n\n"
+    "Transcript:\n"
+)
+_USER_PROMPT_TAIL = "\n\nReturn ONLY the JSON object, with no additional commentary."
 
 
-def _load_utterances_for_encounter(session: Session, encounter_id: str) -> List[Utterance]:
+def _get_session() -> AsyncSession:
+    return AsyncSessionLocal()
+
+
+async def _load_utterances_for_encounter(
+    session: AsyncSession, encounter_id: str
+) -> AsyncResult:
+    """
+    Stream (speaker, text) rows for an encounter in transcript order.
+    Only the columns the builders read are fetched; no ORM hydration.
+    Rows arrive in yield_per batches from a server-side cursor, so the
+    result can be consumed once without holding the whole transcript.
+    """
     stmt = (
-        select(Utterance)
+        select(Utterance.speaker, Utterance.text)
         .where(Utterance.encounter_id == encounter_id)
         .order_by(Utterance.ts.asc(), Utterance.id.asc())
+        .execution_options(yield_per=200)
     )
-    return list(session.scalars(stmt))
+    return await session.stream(stmt)
 
 
-def _extract_chief_complaint(utterances: List[Utterance]) -> str | None:
+async def _scan_utterances(utterances: AsyncResult) -> tuple[str | None, str | None]:
     """
-    Very simple heuristic:
-      - take the first patient utterance text as the chief complaint.
-    """
-    for utt in utterances:
-        if utt.speaker == "patient":
-            return utt.text.strip()
-    return None
-
+    Single pass over the transcript for the heuristic builder.
 
-def _extract_patient_goals(utterances: List[Utterance]) -> str | None:
-    """
-    Heuristic:
-      - last patient utterance is treated as 'anything else' / goals.
+    Returns:
+      - first patient utterance (treated as the chief complaint)
+      - last patient utterance (treated as 'anything else' / goals)
     """
+    first_patient_text = None
     last_patient_text = None
-    for utt in utterances:
-        if utt.speaker == "patient":
-            last_patient_text = utt.text.strip()
-    return last_patient_text
+    async for speaker, text in utterances:
+        if speaker == "patient":
+            last_patient_text = text
+            if first_patient_text is None:
+                first_patient_text = text
+
+    if first_patient_text is None:
+        return None, None
+    return first_patient_text.strip(), last_patient_text.strip()
 
 
-def _extract_symptoms(utterances: List[Utterance]) -> List[Symptom]:
+def _extract_symptoms(chief_complaint: str | None) -> List[Symptom]:
     """
     For now, we just create a single generic symptom if a chief complaint exists.
     Later this will be replaced by an LLM-based extractor.
     """
-    cc = _extract_chief_complaint(utterances)
-    if not cc:
+    if not chief_complaint:
         return []
 
     return [
@@ -72,7 +155,7 @@ def _extract_symptoms(utterances: List[Utterance]) -> List[Symptom]:
     ]
 
 
-def _extract_medications(utterances: List[Utterance]) -> List[Medication]:
+def _extract_medications() -> List[Medication]:
     """
     Placeholder: we don't parse medications yet.
     We return an empty list and will let the LLM fill this in later.
@@ -80,31 +163,51 @@ def _extract_medications(utterances: List[Utterance]) -> List[Medication]:
     return []
 
 
-def _extract_allergies(utterances: List[Utterance]) -> List[Allergy]:
+def _extract_allergies() -> List[Allergy]:
     """
     Placeholder: no allergy parsing yet.
     """
     return []
 
 
-def build_structured_intake_for_encounter(encounter_id: str) -> StructuredIntakeModel:
+async def _upsert_structured_intake(
+    session: AsyncSession,
+    encounter_id: str,
+    intake_model: StructuredIntakeModel,
+) -> None:
+    """
+    Insert or update the structured_intake row for an encounter.
+    The model is dumped once, in JSON mode, since JSONB only holds JSON types.
+    The row's ETag is derived from that same dump.
+    """
+    data = intake_model.model_dump(mode="json")
+    etag = hashlib.blake2b(orjson.dumps(data), digest_size=16).hexdigest()
+
+    existing = await session.get(StructuredIntake, encounter_id)
+    if existing is None:
+        session.add(StructuredIntake(encounter_id=encounter_id, data=data, etag=etag))
+    else:
+        existing.data = data
+        existing.etag = etag
+
+
+async def build_structured_intake_for_encounter(encounter_id: str) -> StructuredIntakeModel:
     """
     Heuristic baseline: builds a StructuredIntakeModel from an encounter
     without using an LLM.
     """
     session = _get_session()
     try:
-        encounter = session.get(Encounter, encounter_id)
+        encounter = await session.get(Encounter, encounter_id)
         if encounter is None:
             raise ValueError(f"Encounter {encounter_id} not found")
 
-        utterances = _load_utterances_for_encounter(session, encounter_id)
-
-        chief_complaint = _extract_chief_complaint(utterances)
-        patient_goals = _extract_patient_goals(utterances)
-        symptoms = _extract_symptoms(utterances)
-        medications = _extract_medications(utterances)
-        allergies = _extract_allergies(utterances)
+        chief_complaint, patient_goals = await _scan_utterances(
+            await _load_utterances_for_encounter(session, encounter_id)
+        )
+        symptoms = _extract_symptoms(chief_complaint)
+        medications = _extract_medications()
+        allergies = _extract_allergies()
 
         intake_model = StructuredIntakeModel(
             chief_complaint=chief_complaint,
@@ -119,35 +222,36 @@ def build_structured_intake_for_encounter(encounter_id: str) -> StructuredIntake
             other_notes=None,
         )
 
-        existing = session.get(StructuredIntake, encounter_id)
-        if existing is None:
-            db_obj = StructuredIntake(
-                encounter_id=encounter_id,
-                data=intake_model.model_dump(),
-            )
-            session.add(db_obj)
-        else:
-            existing.data = intake_model.model_dump()
-
-        session.commit()
+        await _upsert_structured_intake(session, encounter_id, intake_model)
+        await session.commit()
         return intake_model
     finally:
-        session.close()
+        await session.close()
 
-def _build_transcript_text(utterances: List[Utterance]) -> str:
+async def _build_transcript_text(utterances: AsyncResult) -> str:
     """
     Build a plain text transcript like:
 
       assistant: ...
       patient: ...
 
-    for use in the LLM prompt.
+    for use in the LLM prompt. Rows are written into one buffer as they
+    stream in, so there is no per-line string list to hold and join.
     """
-    lines: List[str] = []
-    for utt in utterances:
-        role = "assistant" if utt.speaker == "assistant" else "patient"
-        lines.append(f"{role}: {utt.text}")
-    return "\n".join(lines)
+    buf = io.StringIO()
+    write = buf.write
+    sep = ""
+    async for speaker, text in utterances:
+        write(sep)
+        write("assistant: " if speaker == "assistant" else "patient: ")
+        write(text)
+        sep = "\n"
+    return buf.getvalue()
+
+
+# Captures the body of a ```json ... ``` (or bare ```) fenced block. The
+# closing fence is optional, so a reply that never closes it still parses.
+_FENCE_RE = re.compile(rb"^\s*```(?:json)?\s*(.*?)\s*(?:```\s*)?$", re.S | re.I)
 
 
 def _clean_json_from_llm(raw: str) -> dict:
@@ -155,22 +259,38 @@ def _clean_json_from_llm(raw: str) -> dict:
     Try to robustly parse JSON from the LLM response.
     Handles cases where the model wraps it in ```json ... ``` fences.
     """
-    text = raw.strip()
+    body = raw.encode("utf-8")
+    match = _FENCE_RE.match(body)
+    return orjson.loads(match.group(1) if match else body)
 
-    if text.startswith("```"):
-        # Strip markdown fences if present
-        # e.g. ```json ... ```
-        text = text.lstrip("`")
-        # After stripping leading backticks, remove possible "json"
-        if text.lower().startswith("json"):
-            text = text[4:]
-        # Remove trailing backticks
-        text = text.rstrip("`").strip()
 
-    return json.loads(text)
+async def _read_transcript(encounter_id: str) -> str:
+    """
+    Load an encounter's transcript text in its own short-lived session.
+    """
+    session = _get_session()
+    try:
+        encounter = await session.get(Encounter, encounter_id)
+        if encounter is None:
+            raise ValueError(f"Encounter {encounter_id} not found")
+
+        return await _build_transcript_text(
+            await _load_utterances_for_encounter(session, encounter_id)
+        )
+    finally:
+        await session.close()
 
 
-def build_structured_intake_with_llm(
+def _completion_cache_key(transcript: str) -> str:
+    """
+    Exact-match cache key for an extraction over this transcript.
+    """
+    model = get_settings().llm_model
+    payload = f"{model}|{_PROMPT_VERSION}|{transcript}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def build_structured_intake_with_llm(
     encounter_id: str,
     llm_client: LLMClient,
 ) -> StructuredIntakeModel:
@@ -179,112 +299,47 @@ def build_structured_intake_with_llm(
     then upsert it into structured_intake.
 
     Falls back to the heuristic version if anything goes wrong.
+
+    No DB connection is held across the LLM call: the transcript is read in
+    one short session and the result is written in another.
     """
-    session = _get_session()
     try:
-        encounter = session.get(Encounter, encounter_id)
-        if encounter is None:
-            raise ValueError(f"Encounter {encounter_id} not found")
-
-        utterances = _load_utterances_for_encounter(session, encounter_id)
-        transcript = _build_transcript_text(utterances)
-
-        schema_description = """
-You must return a single JSON object with the following structure:
-
-{
-  "chief_complaint": string or null,
-  "symptoms": [
-    {
-      "name": string,
-      "onset": string or null,
-      "duration": string or null,
-      "location": string or null,
-      "character": string or null,
-      "severity": string or null,
-      "aggravating_factors": string or null,
-      "relieving_factors": string or null,
-      "associated_symptoms": [string, ...],
-      "red_flags": [string, ...]
-    },
-    ...
-  ],
-  "medications": [
-    {
-      "name": string,
-      "dose": string or null,
-      "frequency": string or null,
-      "route": string or null,
-      "indication": string or null
-    },
-    ...
-  ],
-  "allergies": [
-    {
-      "substance": string,
-      "reaction": string or null,
-      "severity": string or null
-    },
-    ...
-  ],
-  "past_medical_history": [string, ...],
-  "family_history": [string, ...],
-  "social_history": [string, ...],
-  "red_flags": [string, ...],
-  "patient_goals": string or null,
-  "other_notes": string or null
-}
-"""
-
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are an AI clinical intake assistant. "
-                    "Given a patient–assistant intake conversation, "
-                    "you extract key clinical information and output strictly formatted JSON.\n\n"
-                    "Do NOT invent details that are not clearly implied. "
-                    "Leave fields null or empty lists if information is missing.\n"
-                ),
-            },
-            {
-                "role": "user",
-                "content": (
-                    "Here is the transcript of an intake conversation between a patient "
-                    "and an AI assistant. Read it carefully and extract the structured information.\n\n"
-                    f"{schema_description}\n\n"
-                    "Transcript:\n"
-                    f"{transcript}\n\n"
-                    "Return ONLY the JSON object, with no additional commentary."
-                ),
-            },
-        ]
-
-        raw = llm_client.chat(messages, temperature=0.1)
+        transcript = await _read_transcript(encounter_id)
+
+        cache_key = _completion_cache_key(transcript)
+        raw = await get_cached_completion(cache_key)
+        from_cache = raw is not None
+        if raw is None:
+            messages = [
+                _SYSTEM_MESSAGE,
+                {
+                    "role": "user",
+                    "content": _USER_PROMPT_HEAD + transcript + _USER_PROMPT_TAIL,
+                },
+            ]
+            raw = await llm_client.chat(messages, temperature=0.1)
         data_dict = _clean_json_from_llm(raw)
 
         # Validate against our Pydantic schema
         intake_model = StructuredIntakeModel.model_validate(data_dict)
 
+        # Only cache completions that parsed and validated
+        if not from_cache:
+            await cache_completion(cache_key, raw)
+
         # Upsert into structured_intake
-        existing = session.get(StructuredIntake, encounter_id)
-        if existing is None:
-            db_obj = StructuredIntake(
-                encounter_id=encounter_id,
-                data=intake_model.model_dump(),
-            )
-            session.add(db_obj)
-        else:
-            existing.data = intake_model.model_dump()
-
-        session.commit()
+        session = _get_session()
+        try:
+            await _upsert_structured_intake(session, encounter_id, intake_model)
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
         return intake_model
 
     except Exception as e:
         # On any error, log (if you add logging) and fall back
         print(f"[LLM summarizer] Error: {e}. Falling back to heuristic builder.")
-        session.rollback()
-        return build_structured_intake_for_encounter(encounter_id)
-    finally:
-        session.close()
-
+        return await build_structured_intake_for_encounter(encounter_id)
@@ -0,0 +1,45 @@
+# app/llm/cache.py
+from __future__ import annotations
+
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.redis_client import get_redis
+
+
+# Cached completions expire after a day.
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+
+def _key(cache_key: str) -> str:
+    return f"llm:completion:{cache_key}"
+
+
+async def get_cached_completion(cache_key: str) -> Optional[str]:
+    """
+    Return a previously cached raw LLM completion, or None on a miss.
+
+    Cache failures are treated as misses so an unavailable Redis never
+    blocks the LLM call itself.
+    """
+    try:
+        raw = await get_redis().get(_key(cache_key))
+    except RedisError as e:
+        print(f"[LLM cache] Read failed: {e}")
+        return None
+    return raw.decode("utf-8") if raw is not None else None
+
+
+async def cache_completion(
+    cache_key: str,
+    completion: str,
+    ttl: int = DEFAULT_TTL_SECONDS,
+) -> None:
+    """
+    Store a raw LLM completion under cache_key for ttl seconds.
+    """
+    try:
+        await get_redis().setex(_key(cache_key), ttl, completion)
+    except RedisError as e:
+        print(f"[LLM cache] Write failed: {e}")
@@ -4,7 +4,8 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import List, Dict, Optional
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI
 
 from app.config import get_settings
 
@@ -15,7 +16,7 @@ class LLMClient(ABC):
     """
 
     @abstractmethod
-    def chat(
+    async def chat(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.2,
@@ -30,7 +31,10 @@ class LLMClient(ABC):
 
 class OpenAILLMClient(LLMClient):
     """
-    OpenAI implementation using the official Python client.
+    OpenAI implementation using the official async Python client.
+
+    All calls share one HTTPX connection pool, so concurrent intakes reuse
+    warm keep-alive/TLS connections instead of opening new ones.
     """
 
     def __init__(self, model: Optional[str] = None):
@@ -40,18 +44,24 @@ class OpenAILLMClient(LLMClient):
                 "OPENAI_API_KEY is not set in environment (.env)."
             )
 
-        # The OpenAI() client will pick up api_key automatically from env if not passed,
+        # The AsyncOpenAI() client will pick up api_key automatically from env if not passed,
         # but we pass it explicitly for clarity.
-        self.client = OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url)
+        self.client = AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=50, max_connections=100)
+            ),
+        )
         self.default_model = model or settings.llm_model
 
-    def chat(
+    async def chat(
         self,
         messages: List[Dict[str, str]],
         temperature: float = 0.2,
         model: Optional[str] = None,
     ) -> str:
-        completion = self.client.chat.completions.create(
+        completion = await self.client.chat.completions.create(
             model=model or self.default_model,
             messages=messages,
             temperature=temperature,
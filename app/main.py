@@ -4,6 +4,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.services import init_db
 from app.api.routes import router as api_router
+from app.rag.warmup import warmup_embeddings
 
 
 app = FastAPI(title="Anamnesis API", version="1.0.0")
@@ -20,6 +21,7 @@ app.add_middleware(
 @app.on_event("startup")
 def on_startup() -> None:
     init_db()
+    warmup_embeddings()
 
 
 @app.get("/")
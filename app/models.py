@@ -15,7 +15,7 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
-from app.db import Base, VectorType
+from app.db import Base, HalfVectorType
 from app.config import get_settings
 
 settings = get_settings()
@@ -104,6 +104,8 @@ class StructuredIntake(Base):
         primary_key=True,
     )
     data: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    # Hash of `data`, computed on write and served as the HTTP ETag
+    etag: Mapped[str | None] = mapped_column(String, nullable=True)
 
     encounter: Mapped[Encounter] = relationship(
         "Encounter", back_populates="structured_intake"
@@ -129,7 +131,7 @@ class PatientChunk(Base):
     text: Mapped[str] = mapped_column(Text, nullable=False)
 
     embedding = mapped_column(
-        VectorType(settings.embedding_dim), nullable=False
+        HalfVectorType(settings.embedding_dim), nullable=False
     )
 
     __table_args__ = (
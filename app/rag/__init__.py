@@ -1,7 +1,7 @@
 # app/rag/__init__.py
 from .embeddings import EmbeddingClient, get_embedding_client
 from .indexer import index_encounter_for_rag
-from .retriever import retrieve_patient_chunks
+from .retriever import retrieve_patient_chunks, retrieve_patient_chunks_many
 from .qa import answer_doctor_question
 
 __all__ = [
@@ -9,5 +9,6 @@ __all__ = [
     "get_embedding_client",
     "index_encounter_for_rag",
     "retrieve_patient_chunks",
+    "retrieve_patient_chunks_many",
     "answer_doctor_question",
 ]
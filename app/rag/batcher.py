@@ -0,0 +1,79 @@
+# app/rag/batcher.py
+from __future__ import annotations
+
+import asyncio
+from typing import List, Tuple
+
+import numpy as np
+
+from app.rag.embeddings import get_embedding_client
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embed requests into one model call.
+
+    Callers await `embed(text)`; a background task collects requests for up
+    to `max_wait` seconds (or until `max_batch` are queued), embeds them in
+    one batch off the event loop, and resolves each caller's future with its
+    row. The queue and worker are created lazily on the running loop.
+    """
+
+    def __init__(self, max_batch: int = 32, max_wait: float = 0.005):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue[Tuple[str, asyncio.Future]] | None = None
+        self._worker: asyncio.Task | None = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        """
+        Wait for one request, then drain more until the window closes.
+        """
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            texts = [text for text, _ in batch]
+            try:
+                embeddings = await asyncio.to_thread(get_embedding_client().embed, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), emb in zip(batch, embeddings):
+                # The caller may have been cancelled while we were embedding
+                if not future.done():
+                    future.set_result(emb)
+
+
+_batcher = EmbeddingBatcher()
+
+
+async def embed_async(text: str) -> np.ndarray:
+    """
+    Embed one text through the shared per-process batcher.
+    """
+    return await _batcher.embed(text)
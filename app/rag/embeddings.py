@@ -1,40 +1,155 @@
 # app/rag/embeddings.py
 from __future__ import annotations
 
+import os
 from functools import lru_cache
+from pathlib import Path
 from typing import List
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
+import onnxruntime as ort
+from transformers import AutoTokenizer
 
 from app.config import get_settings
 
 
+_QUANTIZED_FILE = "model_quantized.onnx"
+
+
+def _export_quantized_model(model_name: str, out_dir: Path) -> None:
+    """
+    One-time export of `model_name` to ONNX plus INT8 dynamic quantization.
+
+    optimum is only needed for this step, so it is imported lazily; once the
+    quantized model is cached, serving only needs onnxruntime.
+    """
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    quantizer = ORTQuantizer.from_pretrained(model)
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=out_dir, quantization_config=qconfig)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(out_dir)
+
+
+def _session_options() -> ort.SessionOptions:
+    """
+    ORT settings for serving under concurrent requests: full graph fusion,
+    half the cores per inference so concurrent calls don't oversubscribe,
+    sequential op execution, and no busy-wait spinning between calls.
+    """
+    opts = ort.SessionOptions()
+    opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    opts.intra_op_num_threads = max(1, (os.cpu_count() or 1) // 2)
+    opts.inter_op_num_threads = 1
+    opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    opts.enable_mem_pattern = True
+    opts.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    return opts
+
+
 class EmbeddingClient:
     """
-    Thin wrapper around a sentence-transformers model.
+    Thin wrapper around an INT8-quantized ONNX export of a
+    sentence-transformers model, run with ONNX Runtime on CPU.
+
+    Produces the same mean-pooled, L2-normalized embeddings as
+    SentenceTransformer.encode(..., normalize_embeddings=True).
     """
 
-    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+        batch_size: int = 32,
+    ):
         settings = get_settings()
         self.dim = settings.embedding_dim
+        self.max_length = 256  # MiniLM's max_seq_length in sentence-transformers
+        self.batch_size = batch_size
+
+        model_dir = Path(settings.onnx_cache_dir) / model_name.replace("/", "__")
+        if not (model_dir / _QUANTIZED_FILE).exists():
+            _export_quantized_model(model_name, model_dir)
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+        # Each worker process loads its own copy of the model. At INT8 the
+        # weights are ~23MB, so sharing pages across workers isn't worth
+        # depending on ORT buffer-ownership tricks that can silently
+        # corrupt outputs.
+        self.session = ort.InferenceSession(
+            str(model_dir / _QUANTIZED_FILE),
+            sess_options=_session_options(),
+            providers=[("CPUExecutionProvider", {"use_arena": True})],
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def count_tokens(self, text: str) -> int:
+        """
+        Number of tokens the model sees for `text`, including [CLS]/[SEP].
+        Anything past max_length is truncated before embedding.
+        """
+        return len(self.tokenizer(text)["input_ids"])
 
     def embed(self, texts: List[str]) -> np.ndarray:
         """
         Returns a numpy array of shape (len(texts), dim).
+
+        Texts are sorted by length and run in sub-batches of batch_size, so
+        each batch pads to a similar length; rows come back in input order.
         """
         if not texts:
             return np.zeros((0, self.dim), dtype=np.float32)
 
-        embeddings = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        batches = [
+            self._embed_batch([texts[i] for i in order[start : start + self.batch_size]])
+            for start in range(0, len(order), self.batch_size)
+        ]
+        embeddings = np.concatenate(batches, axis=0)
+
         if embeddings.shape[1] != self.dim:
             raise ValueError(
                 f"Embedding dimension mismatch: expected {self.dim}, got {embeddings.shape[1]}"
             )
+
+        inv = np.empty_like(order)
+        inv[order] = np.arange(len(order))
+        return embeddings[inv]
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """
+        Run one padded batch through the model and pool it.
+        """
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        # Only feed what the graph declares (some exports drop token_type_ids).
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean-pool over real tokens only, then L2-normalize.
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        embeddings = summed / counts
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
         return embeddings.astype(np.float32)
 
 
+def to_vector_literal(emb: np.ndarray) -> str:
+    """
+    Format an embedding as pgvector's text form, e.g. '[0.1,0.2,...]'.
+    """
+    return "[" + ",".join(f"{x:.6g}" for x in emb) + "]"
+
+
 @lru_cache(maxsize=1)
 def get_embedding_client() -> EmbeddingClient:
     return EmbeddingClient()
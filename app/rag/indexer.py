@@ -1,14 +1,28 @@
 # app/rag/indexer.py
 from __future__ import annotations
 
-from typing import List
+import io
+from typing import Callable, List
 
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
 
 from app.db import SessionLocal
-from app.models import Patient, Encounter, StructuredIntake, Utterance, PatientChunk
-from app.intake.schema import StructuredIntakeModel
-from app.rag.embeddings import get_embedding_client
+from app.models import Encounter, StructuredIntake, Utterance, PatientChunk
+from app.rag.embeddings import get_embedding_client, to_vector_literal
+
+
+# Packed structured sections go one per line; " | " and "; " already
+# occur inside sections (symptoms, medications), so they can't separate them.
+_SECTION_SEP = "\n"
+
+# Below this many chunks a plain executemany is cheaper than setting up COPY.
+_COPY_THRESHOLD = 32
+
+_COPY_SQL = (
+    "COPY patient_chunks (patient_id, encounter_id, source_type, text, embedding) "
+    "FROM STDIN WITH (FORMAT text)"
+)
 
 
 def _get_session() -> Session:
@@ -16,175 +30,198 @@ def _get_session() -> Session:
 
 
 def _load_encounter_with_structured(session: Session, encounter_id: str):
-    enc = session.get(Encounter, encounter_id)
-    if enc is None:
+    # Encounter -> patient id and structured JSON in one round-trip; the
+    # patient row itself is guaranteed by the FK and never needed here.
+    row = session.execute(
+        select(Encounter.patient_id, StructuredIntake.data)
+        .outerjoin(StructuredIntake, StructuredIntake.encounter_id == Encounter.id)
+        .where(Encounter.id == encounter_id)
+    ).one_or_none()
+    if row is None:
         raise ValueError(f"Encounter {encounter_id} not found")
 
-    patient = session.get(Patient, enc.patient_id)
-    if patient is None:
-        raise ValueError(f"Patient {enc.patient_id} not found")
+    patient_id, structured_data = row
 
-    structured = session.get(StructuredIntake, encounter_id)
-    structured_model: StructuredIntakeModel | None = None
-    if structured is not None:
-        structured_model = StructuredIntakeModel.model_validate(structured.data)
-
-    # Load utterances ordered by time
-    utts = (
-        session.query(Utterance)
-        .filter(Utterance.encounter_id == encounter_id)
+    # Load (speaker, text) rows ordered by time; plain tuples, no ORM hydration
+    utts = session.execute(
+        select(Utterance.speaker, Utterance.text)
+        .where(Utterance.encounter_id == encounter_id)
         .order_by(Utterance.ts.asc(), Utterance.id.asc())
-        .all()
-    )
+    ).all()
 
-    return patient, enc, structured_model, utts
+    return patient_id, structured_data, utts
 
 
-def _build_chunks_from_structured(
-    structured: StructuredIntakeModel | None,
-) -> List[tuple[str, str]]:
+def _structured_sections(structured: dict) -> List[str]:
     """
-    Build (source_type, text) chunks from structured intake.
+    Render each non-empty field of the structured intake JSON as a
+    labelled line ("Medications: ...").
+
+    Reads the stored dict directly: it was validated when it was written,
+    so there's no need to re-hydrate a Pydantic model just to read it.
     """
-    chunks: List[tuple[str, str]] = []
-    if structured is None:
-        return chunks
+    sections: List[str] = []
 
-    if structured.chief_complaint:
-        chunks.append(
-            (
-                "structured",
-                f"Chief complaint: {structured.chief_complaint}",
-            )
-        )
+    chief_complaint = structured.get("chief_complaint")
+    if chief_complaint:
+        sections.append(f"Chief complaint: {chief_complaint}")
 
-    if structured.symptoms:
+    symptoms = structured.get("symptoms")
+    if symptoms:
         symptom_strs = []
-        for s in structured.symptoms:
-            parts = [f"name: {s.name}"]
-            if s.onset:
-                parts.append(f"onset: {s.onset}")
-            if s.duration:
-                parts.append(f"duration: {s.duration}")
-            if s.location:
-                parts.append(f"location: {s.location}")
-            if s.character:
-                parts.append(f"character: {s.character}")
-            if s.severity:
-                parts.append(f"severity: {s.severity}")
-            if s.associated_symptoms:
-                parts.append(f"associated: {', '.join(s.associated_symptoms)}")
-            if s.red_flags:
-                parts.append(f"red_flags: {', '.join(s.red_flags)}")
+        for s in symptoms:
+            parts = [f"name: {s['name']}"]
+            for key in ("onset", "duration", "location", "character", "severity"):
+                value = s.get(key)
+                if value:
+                    parts.append(f"{key}: {value}")
+            associated = s.get("associated_symptoms")
+            if associated:
+                parts.append(f"associated: {', '.join(associated)}")
+            red_flags = s.get("red_flags")
+            if red_flags:
+                parts.append(f"red_flags: {', '.join(red_flags)}")
             symptom_strs.append("; ".join(parts))
-        chunks.append(
-            (
-                "structured",
-                "Symptoms: " + " | ".join(symptom_strs),
-            )
-        )
+        sections.append("Symptoms: " + " | ".join(symptom_strs))
 
-    if structured.medications:
+    medications = structured.get("medications")
+    if medications:
         med_strs = []
-        for m in structured.medications:
-            parts = [m.name]
-            if m.dose:
-                parts.append(m.dose)
-            if m.frequency:
-                parts.append(m.frequency)
+        for m in medications:
+            parts = [m["name"]]
+            dose = m.get("dose")
+            if dose:
+                parts.append(dose)
+            frequency = m.get("frequency")
+            if frequency:
+                parts.append(frequency)
             med_strs.append(", ".join(parts))
-        chunks.append(
-            (
-                "structured",
-                "Medications: " + "; ".join(med_strs),
-            )
-        )
+        sections.append("Medications: " + "; ".join(med_strs))
 
-    if structured.allergies:
+    allergies = structured.get("allergies")
+    if allergies:
         all_strs = []
-        for a in structured.allergies:
-            parts = [a.substance]
-            if a.reaction:
-                parts.append(f"reaction: {a.reaction}")
+        for a in allergies:
+            parts = [a["substance"]]
+            reaction = a.get("reaction")
+            if reaction:
+                parts.append(f"reaction: {reaction}")
             all_strs.append(", ".join(parts))
-        chunks.append(
-            (
-                "structured",
-                "Allergies: " + "; ".join(all_strs),
-            )
-        )
+        sections.append("Allergies: " + "; ".join(all_strs))
 
-    if structured.past_medical_history:
-        chunks.append(
-            (
-                "structured",
-                "Past medical history: " + "; ".join(structured.past_medical_history),
-            )
-        )
+    for key, label in (
+        ("past_medical_history", "Past medical history"),
+        ("family_history", "Family history"),
+        ("social_history", "Social history"),
+        ("red_flags", "Red flags"),
+    ):
+        items = structured.get(key)
+        if items:
+            sections.append(f"{label}: " + "; ".join(items))
 
-    if structured.family_history:
-        chunks.append(
-            (
-                "structured",
-                "Family history: " + "; ".join(structured.family_history),
-            )
-        )
+    patient_goals = structured.get("patient_goals")
+    if patient_goals:
+        sections.append(f"Patient goals: {patient_goals}")
 
-    if structured.social_history:
-        chunks.append(
-            (
-                "structured",
-                "Social history: " + "; ".join(structured.social_history),
-            )
-        )
+    other_notes = structured.get("other_notes")
+    if other_notes:
+        sections.append(f"Other notes: {other_notes}")
 
-    if structured.red_flags:
-        chunks.append(
-            (
-                "structured",
-                "Red flags: " + "; ".join(structured.red_flags),
-            )
-        )
+    return sections
 
-    if structured.patient_goals:
-        chunks.append(
-            (
-                "structured",
-                f"Patient goals: {structured.patient_goals}",
-            )
-        )
 
-    if structured.other_notes:
-        chunks.append(
-            (
-                "structured",
-                f"Other notes: {structured.other_notes}",
-            )
-        )
+def _build_chunks_from_structured(
+    structured: dict | None,
+    count_tokens: Callable[[str], int],
+    max_tokens: int,
+) -> List[tuple[str, str]]:
+    """
+    Build (source_type, text) chunks from the structured intake JSON.
+
+    Sections are packed greedily, one per line, into as few chunks as fit
+    the embedding model's window as measured by its own tokenizer (usually
+    one or two), rather than one embedding per field. A single section that
+    is too long on its own still gets a chunk of its own.
+    """
+    if structured is None:
+        return []
+
+    chunks: List[tuple[str, str]] = []
+    current: List[str] = []
+    for section in _structured_sections(structured):
+        if current and count_tokens(_SECTION_SEP.join(current + [section])) > max_tokens:
+            chunks.append(("structured", _SECTION_SEP.join(current)))
+            current = []
+        current.append(section)
+    if current:
+        chunks.append(("structured", _SECTION_SEP.join(current)))
 
     return chunks
 
 
-def _build_chunks_from_utterances(utts: list[Utterance]) -> List[tuple[str, str]]:
-    qas = []
+def _build_chunks_from_utterances(
+    utts: List[tuple[str, str]],
+) -> List[tuple[str, str]]:
+    """
+    Build one ("utterance", text) chunk per question/answer pair, so each
+    stays within the embedding model's window and can be retrieved alone.
+    """
+    chunks: List[tuple[str, str]] = []
     current_question = None
 
-    for u in utts:
-        if u.speaker == "assistant":
-            current_question = u.text
+    for speaker, text in utts:
+        if speaker == "assistant":
+            current_question = text
         else:
             # patient
             if current_question:
-                qas.append(f"Q: {current_question} A: {u.text}")
+                chunks.append(("utterance", f"Q: {current_question} A: {text}"))
             else:
-                qas.append(f"A: {u.text}")
+                chunks.append(("utterance", f"A: {text}"))
 
-    chunks: List[tuple[str, str]] = []
-    if qas:
-        chunks.append(("utterance", "Conversation QA pairs: " + " | ".join(qas)))
     return chunks
 
 
+def _copy_escape(value: str) -> str:
+    """
+    Escape a value for COPY's text format.
+    """
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_chunks(session: Session, rows: List[dict]) -> None:
+    """
+    Bulk-load chunk rows into patient_chunks with COPY FROM STDIN,
+    bypassing the ORM. Runs on the session's connection/transaction.
+    """
+    buf = io.StringIO()
+    write = buf.write
+    for row in rows:
+        write(_copy_escape(row["patient_id"]))
+        write("\t")
+        write(_copy_escape(row["encounter_id"]))
+        write("\t")
+        write(row["source_type"])
+        write("\t")
+        write(_copy_escape(row["text"]))
+        write("\t")
+        write(to_vector_literal(row["embedding"]))
+        write("\n")
+    buf.seek(0)
+
+    raw_conn = session.connection().connection
+    cursor = raw_conn.cursor()
+    try:
+        cursor.copy_expert(_COPY_SQL, buf)
+    finally:
+        cursor.close()
+
+
 def index_encounter_for_rag(encounter_id: str) -> int:
     """
     Build RAG chunks for a given encounter and insert them into patient_chunks.
@@ -193,12 +230,18 @@ def index_encounter_for_rag(encounter_id: str) -> int:
     """
     session = _get_session()
     try:
-        patient, enc, structured_model, utts = _load_encounter_with_structured(
+        patient_id, structured_data, utts = _load_encounter_with_structured(
             session, encounter_id
         )
 
+        emb_client = get_embedding_client()
+
         chunks: List[tuple[str, str]] = []
-        chunks.extend(_build_chunks_from_structured(structured_model))
+        chunks.extend(
+            _build_chunks_from_structured(
+                structured_data, emb_client.count_tokens, emb_client.max_length
+            )
+        )
         chunks.extend(_build_chunks_from_utterances(utts))
 
         if not chunks:
@@ -206,23 +249,30 @@ def index_encounter_for_rag(encounter_id: str) -> int:
             return 0
 
         texts = [c[1] for c in chunks]
-        source_types = [c[0] for c in chunks]
 
-        emb_client = get_embedding_client()
-        embeddings = emb_client.embed(texts)
-
-        # Insert into patient_chunks
-        inserted = 0
-        for (source_type, text), emb in zip(chunks, embeddings):
-            pc = PatientChunk(
-                patient_id=patient.id,
-                encounter_id=encounter_id,
-                source_type=source_type,
-                text=text,
-                embedding=emb,
-            )
-            session.add(pc)
-            inserted += 1
+        # One batched embedding call for every distinct chunk text; repeated
+        # texts (e.g. identical short answers) reuse the same row.
+        unique_texts = list(dict.fromkeys(texts))
+        idx = {t: i for i, t in enumerate(unique_texts)}
+
+        unique_embeddings = emb_client.embed(unique_texts)
+        embeddings = unique_embeddings[[idx[t] for t in texts]]
+
+        rows = [
+            {
+                "patient_id": patient_id,
+                "encounter_id": encounter_id,
+                "source_type": source_type,
+                "text": text,
+                "embedding": emb,
+            }
+            for (source_type, text), emb in zip(chunks, embeddings)
+        ]
+        if len(rows) < _COPY_THRESHOLD:
+            session.execute(insert(PatientChunk), rows)
+        else:
+            _copy_chunks(session, rows)
+        inserted = len(rows)
 
         session.commit()
         print(f"Indexed {inserted} chunks for encounter {encounter_id}")
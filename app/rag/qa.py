@@ -18,7 +18,7 @@ def _build_context(chunks: List[RetrievedChunk]) -> str:
     return "\n".join(lines)
 
 
-def answer_doctor_question(
+async def answer_doctor_question(
     patient_id: str,
     question: str,
     llm_client: LLMClient,
@@ -31,7 +31,7 @@ def answer_doctor_question(
       - answer string
       - list of retrieved chunks (for debugging / UI display)
     """
-    chunks = retrieve_patient_chunks(patient_id=patient_id, query=question, k=k)
+    chunks = await retrieve_patient_chunks(patient_id=patient_id, query=question, k=k)
 
     if not chunks:
         return (
@@ -67,5 +67,5 @@ def answer_doctor_question(
         },
     ]
 
-    answer = llm_client.chat(messages, temperature=0.1)
+    answer = await llm_client.chat(messages, temperature=0.1)
     return answer, chunks
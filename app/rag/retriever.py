@@ -1,6 +1,8 @@
 # app/rag/retriever.py
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import List
 
@@ -8,7 +10,8 @@ from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.db import SessionLocal
-from app.rag.embeddings import get_embedding_client
+from app.rag.batcher import embed_async
+from app.rag.embeddings import get_embedding_client, to_vector_literal
 
 
 @dataclass
@@ -17,33 +20,116 @@ class RetrievedChunk:
     encounter_id: str | None
     source_type: str
     text: str
-    score: float  # approximate distance (lower is better)
+    score: float  # cosine distance, 1 - <q, d> (lower is better)
 
 
 def _get_session() -> Session:
     return SessionLocal()
 
 
-def retrieve_patient_chunks(
+# query -> pgvector literal; lru_cache can't wrap a coroutine, so LRU by hand
+_QUERY_CACHE: OrderedDict[str, str] = OrderedDict()
+_QUERY_CACHE_SIZE = 1024
+
+
+async def _embed_query(query: str) -> str:
+    """
+    Embed a single query string, memoized so repeated questions skip the model.
+
+    Returns pgvector's text form ('[0.1,...]'), formatted once and bound as
+    a single string parameter instead of a per-element float array.
+    """
+    cached = _QUERY_CACHE.get(query)
+    if cached is not None:
+        _QUERY_CACHE.move_to_end(query)
+        return cached
+
+    literal = to_vector_literal(await embed_async(query))
+    _cache_query(query, literal)
+    return literal
+
+
+async def _embed_queries(queries: List[str]) -> List[str]:
+    """
+    Embed several queries as vector literals, in input order. Cache misses
+    go through one batched model call instead of one call per query.
+    """
+    literals = {q: _QUERY_CACHE.get(q) for q in queries}
+    misses = [q for q, literal in literals.items() if literal is None]
+    if misses:
+        embeddings = await asyncio.to_thread(get_embedding_client().embed, misses)
+        for query, emb in zip(misses, embeddings):
+            literals[query] = to_vector_literal(emb)
+            _cache_query(query, literals[query])
+    return [literals[q] for q in queries]
+
+
+def _cache_query(query: str, literal: str) -> None:
+    _QUERY_CACHE[query] = literal
+    _QUERY_CACHE.move_to_end(query)
+    if len(_QUERY_CACHE) > _QUERY_CACHE_SIZE:
+        _QUERY_CACHE.popitem(last=False)
+
+
+async def retrieve_patient_chunks(
     patient_id: str,
     query: str,
     k: int = 5,
 ) -> List[RetrievedChunk]:
     """
     Retrieve top-k chunks for a given patient and query using pgvector similarity.
+
+    The query is embedded through the shared micro-batcher; the DB search
+    is blocking and runs in a worker thread.
+    """
+    query_emb = await _embed_query(query)
+    return await asyncio.to_thread(_search_patient_chunks, patient_id, query_emb, k)
+
+
+async def retrieve_patient_chunks_many(
+    patient_id: str,
+    queries: List[str],
+    k: int = 5,
+) -> List[List[RetrievedChunk]]:
+    """
+    Retrieve top-k chunks for each of several queries against one patient.
+
+    All queries are embedded in one model call and searched in one SQL
+    statement. Returns one list of chunks per query, in input order.
     """
-    emb_client = get_embedding_client()
-    query_emb = emb_client.embed([query])[0]  # shape (dim,)
+    if not queries:
+        return []
 
+    query_embs = await _embed_queries(queries)
+    return await asyncio.to_thread(
+        _search_patient_chunks_many, patient_id, query_embs, k
+    )
+
+
+def _search_patient_chunks(
+    patient_id: str,
+    query_emb: str,
+    k: int,
+) -> List[RetrievedChunk]:
     session = _get_session()
     try:
+        # Fetch the patient's rows via the patient_id btree, then rank them
+        # exactly. MATERIALIZED keeps the planner from walking a table-wide
+        # ANN index and filtering on patient_id afterwards, which can return
+        # fewer than k rows (or none) for a given patient.
+        # Vectors are L2-normalized, so negative inner product (<#>) orders
+        # exactly like cosine distance.
         sql = text(
             """
+            WITH patient_rows AS MATERIALIZED (
+                SELECT id, encounter_id, source_type, text, embedding
+                FROM patient_chunks
+                WHERE patient_id = :patient_id
+            )
             SELECT id, encounter_id, source_type, text,
-                   (embedding <-> CAST(:query_embedding AS vector)) AS distance
-            FROM patient_chunks
-            WHERE patient_id = :patient_id
-            ORDER BY embedding <-> CAST(:query_embedding AS vector)
+                   (embedding <#> CAST(:query_embedding AS halfvec)) AS neg_ip
+            FROM patient_rows
+            ORDER BY neg_ip
             LIMIT :k;
             """
         )
@@ -52,22 +138,75 @@ def retrieve_patient_chunks(
             sql,
             {
                 "patient_id": patient_id,
-                "query_embedding": query_emb.tolist(),
+                "query_embedding": query_emb,
+                "k": k,
+            },
+        ).fetchall()
+
+        # Positional unpack skips per-row attribute lookups on Row
+        return [
+            RetrievedChunk(
+                id=chunk_id,
+                encounter_id=encounter_id,
+                source_type=source_type,
+                text=chunk_text,
+                score=1.0 + float(neg_ip) if neg_ip is not None else 0.0,
+            )
+            for chunk_id, encounter_id, source_type, chunk_text, neg_ip in rows
+        ]
+    finally:
+        session.close()
+
+
+def _search_patient_chunks_many(
+    patient_id: str,
+    query_embs: List[str],
+    k: int,
+) -> List[List[RetrievedChunk]]:
+    session = _get_session()
+    try:
+        # Same patient-scoped search as _search_patient_chunks, run per query
+        # via LATERAL over the unnested query vectors.
+        sql = text(
+            """
+            WITH patient_rows AS MATERIALIZED (
+                SELECT id, encounter_id, source_type, text, embedding
+                FROM patient_chunks
+                WHERE patient_id = :patient_id
+            )
+            SELECT q.i, c.id, c.encounter_id, c.source_type, c.text, c.neg_ip
+            FROM unnest(CAST(:query_embeddings AS text[])) WITH ORDINALITY AS q(vec, i)
+            CROSS JOIN LATERAL (
+                SELECT id, encounter_id, source_type, text,
+                       (embedding <#> CAST(q.vec AS halfvec)) AS neg_ip
+                FROM patient_rows
+                ORDER BY neg_ip
+                LIMIT :k
+            ) AS c
+            ORDER BY q.i, c.neg_ip;
+            """
+        )
+
+        rows = session.execute(
+            sql,
+            {
+                "patient_id": patient_id,
+                "query_embeddings": query_embs,
                 "k": k,
             },
         ).fetchall()
 
-        chunks: List[RetrievedChunk] = []
-        for row in rows:
-            chunks.append(
+        results: List[List[RetrievedChunk]] = [[] for _ in query_embs]
+        for i, chunk_id, encounter_id, source_type, chunk_text, neg_ip in rows:
+            results[i - 1].append(
                 RetrievedChunk(
-                    id=row.id,
-                    encounter_id=row.encounter_id,
-                    source_type=row.source_type,
-                    text=row.text,
-                    score=float(row.distance) if row.distance is not None else 0.0,
+                    id=chunk_id,
+                    encounter_id=encounter_id,
+                    source_type=source_type,
+                    text=chunk_text,
+                    score=1.0 + float(neg_ip) if neg_ip is not None else 0.0,
                 )
             )
-        return chunks
+        return results
     finally:
         session.close()
@@ -0,0 +1,52 @@
+# app/rag/vector_index.py
+from __future__ import annotations
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.config import get_settings
+
+
+def _migrate_embedding_to_halfvec(conn: Connection) -> None:
+    """
+    Convert patient_chunks.embedding from FP32 `vector` to FP16 `halfvec`
+    on databases created before the switch.
+    """
+    col_type = conn.execute(
+        text(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = 'patient_chunks'::regclass AND attname = 'embedding';"
+        )
+    ).scalar_one()
+    if col_type.startswith("halfvec"):
+        return
+
+    dim = get_settings().embedding_dim
+    conn.execute(
+        text(
+            f"ALTER TABLE patient_chunks ALTER COLUMN embedding TYPE halfvec({dim}) "
+            f"USING embedding::halfvec({dim});"
+        )
+    )
+
+
+def create_vector_indexes(conn: Connection) -> None:
+    """
+    Migrate the embedding column and create the patient_id index that
+    retrieval relies on, if it doesn't exist yet.
+
+    Retrieval ranks exactly within one patient's rows (a few dozen chunks),
+    so there is deliberately no table-wide ANN index: pgvector applies the
+    patient_id filter after an HNSW scan, which returns only ~ef_search rows
+    from the whole table and can miss a patient's chunks entirely. A
+    binary-quantized (bit) index has the same problem, made worse by the
+    many ties in Hamming distance, so none is built either.
+    """
+    _migrate_embedding_to_halfvec(conn)
+
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_patient_chunks_patient "
+            "ON patient_chunks (patient_id);"
+        )
+    )
@@ -0,0 +1,17 @@
+# app/rag/warmup.py
+from __future__ import annotations
+
+import time
+
+from app.rag.embeddings import get_embedding_client
+
+
+def warmup_embeddings() -> None:
+    """
+    Load the embedding model and run one inference so the first request
+    doesn't pay for model load, session init and first-run kernel setup.
+    Call once at process startup.
+    """
+    start = time.perf_counter()
+    get_embedding_client().embed(["warmup"])
+    print(f"[RAG] Embedding model warmed up in {time.perf_counter() - start:.2f}s")
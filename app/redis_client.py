@@ -0,0 +1,17 @@
+# app/redis_client.py
+from __future__ import annotations
+
+from functools import lru_cache
+
+from redis.asyncio import Redis
+
+from app.config import get_settings
+
+
+@lru_cache(maxsize=1)
+def get_redis() -> Redis:
+    """
+    Process-wide async Redis client (and connection pool), shared by the
+    intake session store and the LLM completion cache.
+    """
+    return Redis.from_url(get_settings().redis_url)
@@ -5,12 +5,13 @@ from contextlib import contextmanager
 from datetime import datetime, timezone
 from typing import Optional, Tuple
 
-from sqlalchemy import text
+from sqlalchemy import insert, text
 
 from app.db import SessionLocal, engine, Base
-from app.models import Patient, Encounter, Utterance
+from app.models import Patient, Encounter, Utterance, generate_uuid
 from app.intake.agent import IntakeAgent
 from app.intake.state import IntakeState
+from app.rag.vector_index import create_vector_indexes
 
 
 @contextmanager
@@ -28,7 +29,7 @@ def db_session():
 
 def init_db() -> None:
     """
-    Ensure pgvector extension and create all tables.
+    Ensure pgvector extension, create all tables and the vector indexes.
     Call this once at startup (e.g. from scripts).
     """
     with engine.connect() as conn:
@@ -37,6 +38,14 @@ def init_db() -> None:
 
     Base.metadata.create_all(bind=engine)
 
+    # create_all doesn't add columns to existing tables
+    with engine.connect() as conn:
+        conn.execute(
+            text("ALTER TABLE structured_intake ADD COLUMN IF NOT EXISTS etag VARCHAR;")
+        )
+        create_vector_indexes(conn)
+        conn.commit()
+
 
 class IntakeSessionService:
     """
@@ -44,6 +53,10 @@ class IntakeSessionService:
       - creating Patient and Encounter rows
       - driving the IntakeAgent
       - persisting Utterances to the database
+
+    Turns are buffered on IntakeState while the intake runs and written
+    to Utterances in a single INSERT once it completes, so an intake
+    costs one transcript write instead of one per turn.
     """
 
     def __init__(self):
@@ -62,32 +75,29 @@ class IntakeSessionService:
           - patient_id
           - encounter_id
         """
+        # Ids are generated here so both rows can go out as Core inserts,
+        # without ORM instances or flushes to read the ids back.
+        patient_id = generate_uuid()
+        encounter_id = generate_uuid()
+
         with db_session() as session:
-            patient = Patient(display_name=patient_display_name)
-            session.add(patient)
-            session.flush()  # to get patient.id
-
-            encounter = Encounter(
-                patient_id=patient.id,
-                started_at=datetime.now(timezone.utc),
-                chief_complaint=None,
+            session.execute(
+                insert(Patient).values(id=patient_id, display_name=patient_display_name)
+            )
+            session.execute(
+                insert(Encounter).values(
+                    id=encounter_id,
+                    patient_id=patient_id,
+                    started_at=datetime.now(timezone.utc),
+                    chief_complaint=None,
+                )
             )
-            session.add(encounter)
-            session.flush()  # to get encounter.id
 
-            # Kick off the intake conversation
+            # Kick off the intake conversation; the first question stays
+            # buffered on the state until the intake completes.
             state, first_question = self.agent.start()
 
-            # Persist the first assistant utterance
-            utterance = Utterance(
-                encounter_id=encounter.id,
-                speaker="assistant",
-                text=first_question,
-                ts=datetime.now(timezone.utc),
-            )
-            session.add(utterance)
-
-            return state, first_question, patient.id, encounter.id
+            return state, first_question, patient_id, encounter_id
 
     def handle_turn(
         self,
@@ -97,35 +107,38 @@ class IntakeSessionService:
     ) -> Tuple[IntakeState, Optional[str]]:
         """
         Handle a single patient message:
-          - persist patient's message to Utterances
-          - step the IntakeAgent
-          - persist assistant's next question (if any)
+          - step the IntakeAgent (which records both turns on the state)
+          - on the turn that completes the intake, persist the full
+            transcript to Utterances
 
         Returns:
           - updated state
           - next assistant question (or None if done)
         """
-        with db_session() as session:
-            # Persist patient utterance
-            patient_utt = Utterance(
-                encounter_id=encounter_id,
-                speaker="patient",
-                text=patient_message,
-                ts=datetime.now(timezone.utc),
-            )
-            session.add(patient_utt)
-
-            # Step the agent
-            state, next_q = self.agent.step(state, patient_message)
-
-            # Persist assistant utterance (if any)
-            if next_q is not None:
-                assistant_utt = Utterance(
-                    encounter_id=encounter_id,
-                    speaker="assistant",
-                    text=next_q,
-                    ts=datetime.now(timezone.utc),
-                )
-                session.add(assistant_utt)
+        was_complete = state.is_complete
+
+        state, next_q = self.agent.step(state, patient_message)
+
+        if state.is_complete and not was_complete:
+            self._persist_transcript(state, encounter_id)
+
+        return state, next_q
 
-            return state, next_q
+    def _persist_transcript(self, state: IntakeState, encounter_id: str) -> None:
+        """
+        Write every buffered turn to Utterances in one multi-row INSERT.
+        """
+        rows = [
+            {
+                "encounter_id": encounter_id,
+                "speaker": turn.role,
+                "text": turn.content,
+                "ts": turn.ts,
+            }
+            for turn in state.turns
+        ]
+        if not rows:
+            return
+
+        with db_session() as session:
+            session.execute(insert(Utterance), rows)
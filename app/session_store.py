@@ -0,0 +1,67 @@
+# app/session_store.py
+from __future__ import annotations
+
+import sys
+from datetime import datetime
+from typing import List, Tuple
+
+import msgspec
+
+from app.intake.stages import IntakeStage
+from app.intake.state import IntakeState, IntakeTurn
+from app.redis_client import get_redis
+
+
+class _StoredState(msgspec.Struct, array_like=True):
+    """
+    Wire format for IntakeState in Redis.
+
+    `structured` is not carried here: it is built from the persisted
+    transcript once the intake completes, never from session state.
+    """
+
+    stage: str
+    turns: List[Tuple[str, str, datetime]]
+    stage_question_count: int
+    is_complete: bool
+
+
+_encoder = msgspec.msgpack.Encoder()
+_decoder = msgspec.msgpack.Decoder(_StoredState)
+
+
+def _key(encounter_id: str) -> str:
+    return f"intake:state:{encounter_id}"
+
+
+async def get(encounter_id: str) -> IntakeState | None:
+    """
+    Load the intake state for an encounter, or None if it is unknown/expired.
+    """
+    raw = await get_redis().get(_key(encounter_id))
+    if raw is None:
+        return None
+
+    stored = _decoder.decode(raw)
+    return IntakeState(
+        stage=IntakeStage(stored.stage),
+        turns=[
+            IntakeTurn(role=sys.intern(role), content=content, ts=ts)
+            for role, content, ts in stored.turns
+        ],
+        stage_question_count=stored.stage_question_count,
+        is_complete=stored.is_complete,
+    )
+
+
+async def put(encounter_id: str, state: IntakeState, ttl: int = 3600) -> None:
+    """
+    Store the intake state for an encounter, refreshing its TTL (seconds).
+    """
+    stored = _StoredState(
+        stage=state.stage.value,
+        turns=[(t.role, t.content, t.ts) for t in state.turns],
+        stage_question_count=state.stage_question_count,
+        is_complete=state.is_complete,
+    )
+    await get_redis().set(_key(encounter_id), _encoder.encode(stored), ex=ttl)
@@ -126,16 +126,29 @@ const App: React.FC = () => {
     setQaLoading(false);
   };
 
-  const fetchStructuredIntake = async (encId: string) => {
+  // The structured note is built in the background after the final intake
+  // turn, so poll until it exists (404 means "not ready yet").
+  const fetchStructuredIntake = async (
+    encId: string,
+    attempts = 30,
+    delayMs = 1000
+  ) => {
     setStructuredLoading(true);
     try {
-      const res = await fetch(`${API_BASE}/encounters/${encId}/structured`);
-      if (!res.ok) {
-        console.warn("No structured intake available yet.");
-        return;
+      for (let i = 0; i < attempts; i++) {
+        const res = await fetch(`${API_BASE}/encounters/${encId}/structured`);
+        if (res.ok) {
+          const data: StructuredIntake = await res.json();
+          setStructuredIntake(data);
+          return;
+        }
+        if (res.status !== 404) {
+          console.warn("Fetching structured intake failed:", res.status);
+          return;
+        }
+        await new Promise((resolve) => setTimeout(resolve, delayMs));
       }
-      const data: StructuredIntake = await res.json();
-      setStructuredIntake(data);
+      console.warn("No structured intake available yet.");
     } catch (err) {
       console.error(err);
     } finally {
@@ -219,10 +232,7 @@ const App: React.FC = () => {
       }
       if (data.is_complete) {
         setIntakeComplete(true);
-        // small delay so structured builder/indexing can finish
-        setTimeout(() => {
-          if (encounterId) fetchStructuredIntake(encounterId);
-        }, 500);
+        fetchStructuredIntake(encounterId);
       }
     } catch (err) {
       console.error("Error during intake:", err);
@@ -456,7 +466,7 @@ const App: React.FC = () => {
 
             {intakeComplete && (
               <p className="mt-3 text-[11px] text-emerald-300">
-                Intake finished. A structured note has been generated and indexed for
+                Intake finished. A structured note is being generated and indexed for
                 the doctor.
               </p>
             )}